@@ -29,6 +29,7 @@ setup(
     entry_points={
         'console_scripts': [
             'shazam=shazam.cli:main',
+            'shazam-eval=shazam.evaluate:main',
         ],
     },
     python_requires=">=3.8",
@@ -25,13 +25,13 @@ class ShazamCLI:
         if self.config.is_first_run():
             return  # Model will be loaded after setup
         
-        model_path = self.config.get('model_path')
+        model_path = self.config.snapshot.model_path
         if not model_path or not os.path.exists(model_path):
             print(f"{Fore.RED}Model file not found. Please run setup again.{Style.RESET_ALL}")
             return
         
         try:
-            model_params = self.config.get('model_params', {})
+            model_params = self.config.snapshot.model_params
             self.model = ModelInterface(model_path, **model_params)
         except Exception as e:
             print(f"{Fore.RED}Failed to load model: {e}{Style.RESET_ALL}")
@@ -45,13 +45,14 @@ class ShazamCLI:
         
         print(f"{Fore.YELLOW}Thinking...{Style.RESET_ALL}")
         
+        snapshot = self.config.snapshot
         try:
             command = self.model.generate_command(
                 prompt,
-                max_tokens=self.config.get('model_params.max_tokens', 150),
-                temperature=self.config.get('model_params.temperature', 0.1),
-                top_p=self.config.get('model_params.top_p', 0.9),
-                stop_sequences=self.config.get('model_params.stop_sequences')
+                max_tokens=snapshot.max_tokens,
+                temperature=snapshot.temperature,
+                top_p=snapshot.top_p,
+                stop_sequences=snapshot.stop_sequences
             )
             
             if not command:
@@ -64,11 +65,59 @@ class ShazamCLI:
             print(f"{Fore.RED}Error generating command: {e}{Style.RESET_ALL}")
             return ""
     
+    def generate_candidates(self, prompt: str, n: int) -> list:
+        """Generate up to n alternative bash commands from prompt in one pass"""
+        if not self.model:
+            print(f"{Fore.RED}Model not loaded. Please check your configuration.{Style.RESET_ALL}")
+            return []
+        
+        print(f"{Fore.YELLOW}Thinking...{Style.RESET_ALL}")
+        
+        snapshot = self.config.snapshot
+        try:
+            candidates = self.model.generate_candidates(
+                prompt,
+                n=n,
+                max_tokens=snapshot.max_tokens,
+                stop_sequences=snapshot.stop_sequences,
+                dangerous_patterns=snapshot.dangerous_commands
+            )
+            
+            if not candidates:
+                print(f"{Fore.RED}Could not generate command for: {prompt}{Style.RESET_ALL}")
+                return []
+            
+            return [command for command, _ in candidates]
+            
+        except Exception as e:
+            print(f"{Fore.RED}Error generating command: {e}{Style.RESET_ALL}")
+            return []
+    
+    def choose_command(self, candidates: list) -> str:
+        """Show candidates as a numbered menu and return the chosen one"""
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else ""
+        
+        print(f"{Fore.GREEN}Suggested commands:{Style.RESET_ALL}")
+        for i, command in enumerate(candidates, 1):
+            warning = f" {Fore.RED}⚠️{Style.RESET_ALL}" if not self.is_safe_command(command) else ""
+            print(f"  {Fore.YELLOW}{i}.{Style.RESET_ALL} {Fore.CYAN}{command}{Style.RESET_ALL}{warning}")
+        
+        try:
+            choice = click.prompt(
+                f"{Fore.YELLOW}Choose a command{Style.RESET_ALL}",
+                type=click.IntRange(1, len(candidates)),
+                default=1
+            )
+        except click.Abort:
+            print(f"\n{Fore.BLUE}Command cancelled.{Style.RESET_ALL}")
+            return ""
+        
+        return candidates[choice - 1]
+    
     def is_safe_command(self, command: str) -> bool:
         """Check if command is safe to execute"""
-        dangerous_commands = self.config.get('safety.dangerous_commands', [])
-        
-        if self.model.is_dangerous_command(command, dangerous_commands):
+        if self.model.is_dangerous_command(command, self.config.snapshot.dangerous_commands):
             return False
         
         return True
@@ -128,15 +177,18 @@ class ShazamCLI:
         
         return False
 
-# Create a global instance
-shazam_cli = ShazamCLI()
+# Global instance, created on first CLI invocation so importing the package stays cheap
+shazam_cli = None
 
 @click.command()
 @click.argument('prompt', required=False)
 @click.option('-r', '--run', is_flag=True, help='Automatically execute the generated command')
+@click.option('-n', '--candidates', type=click.IntRange(min=1), default=1,
+              help='Number of alternative commands to choose from '
+                   '(ranked by likelihood; ignores temperature and top_p)')
 @click.option('--setup', is_flag=True, help='Run the setup wizard')
 @click.option('--config', help='Show or set configuration values')
-def main(prompt, run, setup, config):
+def main(prompt, run, candidates, setup, config):
     """
     🚀 Shazam - AI-powered bash command generator
     
@@ -145,8 +197,12 @@ def main(prompt, run, setup, config):
     Examples:
         shazam "list all python files"
         shazam -r "show disk usage"
+        shazam -n 3 "compress the logs folder"
         shazam --setup
     """
+    global shazam_cli
+    if shazam_cli is None:
+        shazam_cli = ShazamCLI()
     
     # Handle setup
     if setup or shazam_cli.config.is_first_run():
@@ -182,7 +238,10 @@ def main(prompt, run, setup, config):
         return
     
     # Generate and execute command
-    command = shazam_cli.generate_command(prompt)
+    if candidates > 1:
+        command = shazam_cli.choose_command(shazam_cli.generate_candidates(prompt, candidates))
+    else:
+        command = shazam_cli.generate_command(prompt)
     if command:
         shazam_cli.execute_command(command, auto_run=run)
 
@@ -4,20 +4,102 @@ Configuration management for Shazam CLI tool
 """
 
 import os
-import yaml
+import sys
+import stat as stat_module
 import json
+import marshal
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
 import shutil
 import importlib.resources as pkg_resources
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Bump when the snapshot payload or ConfigSnapshot fields change
+SNAPSHOT_VERSION = 2
+
+# Keys in model_params that belong to generation rather than model loading
+GENERATION_KEYS = ('max_tokens', 'temperature', 'top_p', 'stop_sequences')
+
+
+class ConfigSnapshot(NamedTuple):
+    """Resolved settings needed on every invocation"""
+    model_path: Optional[str]
+    model_params: Dict[str, Any]  # load-time params only, see GENERATION_KEYS
+    max_tokens: int
+    temperature: float
+    top_p: float
+    stop_sequences: Optional[List[str]]
+    dangerous_commands: Tuple[str, ...]
+    require_confirmation: bool
+
+
+def _flatten(config: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Map every dotted key path (including nested sections) to its value"""
+    flat = {}
+    for key, value in config.items():
+        # Keys get() could never reach stay unreachable
+        if not isinstance(key, str) or '.' in key:
+            continue
+        path = prefix + key
+        flat[path] = value
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + '.'))
+    return flat
+
+
+def _stat_key(stat: os.stat_result) -> Tuple[int, int, int]:
+    """Identity of a config file version; changes on every edit or atomic replace"""
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _atomic_write(path: Path, data: bytes) -> os.stat_result:
+    """Write data to path via a temp file and rename, returning the new file's stat.
+
+    Symlinks are followed so a linked config (e.g. from a dotfiles repo) is updated in
+    place, and the file keeps its existing mode (or the umask default for new files).
+    """
+    path = Path(os.path.realpath(path))
+    try:
+        mode = stat_module.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=path.name + '.', suffix='.tmp')
+    try:
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return stat
+
+
 class Config:
     def __init__(self):
         self.config_dir = Path.home() / '.shazam'
         self.config_file = self.config_dir / 'config.yaml'
+        self.snapshot_file = self.config_dir / 'config.snapshot'
+        self.lock_file = self.config_dir / 'config.lock'
         self.models_dir = self.config_dir / "models"
         self.models_dir.mkdir(parents=True, exist_ok=True)
-        self.config = self._load_config()
+        self.config, self._flat, self.snapshot = self._load_config()
         self._ensure_default_model()
 
     def _ensure_default_model(self):
@@ -30,13 +112,87 @@ class Config:
             except Exception as e:
                 print(f"⚠️ Could not copy default model: {e}")
     
-    def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from file or create default"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return yaml.safe_load(f) or {}
-        else:
-            return self._create_default_config()
+    def _load_config(self) -> Tuple[Dict[str, Any], Dict[str, Any], ConfigSnapshot]:
+        """Load configuration from the compiled snapshot, the YAML file, or defaults"""
+        try:
+            stat = self.config_file.stat()
+        except FileNotFoundError:
+            config = self._create_default_config()
+            flat = _flatten(config)
+            return config, flat, self._build_snapshot(flat)
+        
+        cached = self._read_snapshot(_stat_key(stat))
+        if cached is not None:
+            return cached
+        
+        stat, config = self._parse_config_file()
+        flat = _flatten(config)
+        snapshot = self._build_snapshot(flat)
+        self._write_snapshot(_stat_key(stat), config, flat, snapshot)
+        return config, flat, snapshot
+    
+    def _parse_config_file(self) -> Tuple[os.stat_result, Dict[str, Any]]:
+        """Parse the YAML config, returning it with the stat of the version read"""
+        import yaml
+        with open(self.config_file, 'r') as f:
+            stat = os.fstat(f.fileno())
+            return stat, yaml.safe_load(f) or {}
+    
+    def _build_snapshot(self, flat: Dict[str, Any]) -> ConfigSnapshot:
+        """Resolve the per-invocation settings from the flattened config"""
+        return ConfigSnapshot(
+            model_path=flat.get('model_path'),
+            model_params={key: value for key, value in (flat.get('model_params') or {}).items()
+                          if key not in GENERATION_KEYS},
+            max_tokens=flat.get('model_params.max_tokens', 150),
+            temperature=flat.get('model_params.temperature', 0.1),
+            top_p=flat.get('model_params.top_p', 0.9),
+            stop_sequences=flat.get('model_params.stop_sequences'),
+            dangerous_commands=tuple(flat.get('safety.dangerous_commands') or ()),
+            require_confirmation=flat.get('safety.require_confirmation', True)
+        )
+    
+    def _read_snapshot(self, stat_key: Tuple[int, int, int]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], ConfigSnapshot]]:
+        """Load the compiled snapshot if it was built from the current YAML file"""
+        try:
+            with open(self.snapshot_file, 'rb') as f:
+                version, python, key, config, flat, fields = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        
+        # marshal's format is only stable within a Python version
+        if version != SNAPSHOT_VERSION or python != tuple(sys.version_info[:2]) or key != stat_key:
+            return None
+        return config, flat, ConfigSnapshot(*fields)
+    
+    def _write_snapshot(self, stat_key: Tuple[int, int, int], config: Dict[str, Any],
+                        flat: Dict[str, Any], snapshot: ConfigSnapshot):
+        """Cache the compiled config next to the YAML file"""
+        payload = (SNAPSHOT_VERSION, tuple(sys.version_info[:2]), stat_key, config, flat, tuple(snapshot))
+        try:
+            _atomic_write(self.snapshot_file, marshal.dumps(payload))
+        except (OSError, ValueError):
+            # Unmarshallable YAML values or a read-only directory: fall back to parsing YAML
+            pass
+    
+    @contextmanager
+    def _lock(self):
+        """Hold an exclusive lock across a read-modify-write of the config files"""
+        self.config_dir.mkdir(exist_ok=True)
+        with open(self.lock_file, 'a+') as f:
+            f.seek(0)
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
     
     def _create_default_config(self) -> Dict[str, Any]:
         """Create default configuration"""
@@ -66,31 +222,37 @@ class Config:
     
     def save_config(self):
         """Save current configuration to file"""
+        with self._lock():
+            self._write_config()
+    
+    def _write_config(self):
+        """Write the YAML file and its snapshot; caller holds the lock"""
+        import yaml
         self.config_dir.mkdir(exist_ok=True)
-        with open(self.config_file, 'w') as f:
-            yaml.dump(self.config, f, default_flow_style=False, indent=2)
+        data = yaml.dump(self.config, default_flow_style=False, indent=2).encode('utf-8')
+        stat = _atomic_write(self.config_file, data)
+        self._flat = _flatten(self.config)
+        self.snapshot = self._build_snapshot(self._flat)
+        self._write_snapshot(_stat_key(stat), self.config, self._flat, self.snapshot)
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value"""
-        keys = key.split('.')
-        value = self.config
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        return value
+        return self._flat.get(key, default)
     
     def set(self, key: str, value: Any):
         """Set configuration value"""
-        keys = key.split('.')
-        config = self.config
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        config[keys[-1]] = value
-        self.save_config()
+        with self._lock():
+            # Re-read under the lock so concurrent writers don't drop each other's changes
+            if self.config_file.exists():
+                self.config = self._parse_config_file()[1]
+            keys = key.split('.')
+            config = self.config
+            for k in keys[:-1]:
+                if k not in config:
+                    config[k] = {}
+                config = config[k]
+            config[keys[-1]] = value
+            self._write_config()
     
     def is_first_run(self) -> bool:
         """Check if this is the first run"""
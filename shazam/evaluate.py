@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Model evaluation for Shazam CLI tool
+Compares GGUF models / quantizations on accuracy, latency and memory
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import hashlib
+import multiprocessing
+import multiprocessing.connection
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import click
+from colorama import init, Fore, Style
+from .config import Config
+from .model import ModelInterface
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Initialize colorama for cross-platform colored output
+init(autoreset=True)
+
+
+def load_dataset(path: str) -> List[Dict[str, str]]:
+    """Load held-out NL->bash pairs from a JSONL file of {"prompt", "command"} objects"""
+    examples = []
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'prompt' not in record or 'command' not in record:
+                raise ValueError(f"{path}:{line_no}: expected 'prompt' and 'command' keys")
+            examples.append({'prompt': record['prompt'], 'command': record['command']})
+    return examples
+
+
+# Short flags that take no argument, per command. Only these are reordered or
+# unbundled, so flags with arguments (tar -f, find -name) are never rewritten.
+BOOLEAN_SHORT_FLAGS = {
+    'ls': set('aAlhrtSRd1iFG'),
+    'df': set('ahiTlP'),
+    'du': set('achsxSL'),
+    'grep': set('rRinvlLcwxEFPoqsHh'),
+    'rm': set('rRfiIvd'),
+    'cp': set('rRfiavpnuL'),
+    'mv': set('fivnu'),
+    'mkdir': set('pv'),
+    'free': set('bkmghtlw'),
+    'wc': set('lwcmL'),
+    'sort': set('bdfghinMRruVcC'),
+    'uniq': set('cdDiu'),
+    'uname': set('asnrvmpio'),
+    'netstat': set('atunlpres'),
+    'ss': set('atunlpres'),
+    'chmod': set('Rvcf'),
+    'chown': set('Rvcfh'),
+}
+
+# Short flags that take an argument, for the commands above. Their argument is
+# passed through untouched even when it looks like a flag (grep -e -v).
+ARGUMENT_SHORT_FLAGS = {
+    'ls': set('IwT'),
+    'df': set('txB'),
+    'du': set('dBtX'),
+    'grep': set('efmABCdD'),
+    'cp': set('tS'),
+    'mv': set('tS'),
+    'mkdir': set('m'),
+    'free': set('sc'),
+    'sort': set('ktoST'),
+    'uniq': set('fsw'),
+    'ss': set('fAF'),
+}
+
+# Operators that separate simple commands in a pipeline or list
+COMMAND_SEPARATORS = ('||', '&&', '|', ';', '&')
+
+
+def _is_redirection(command: str, i: int) -> bool:
+    """Whether the character at i is the & of a redirection (2>&1, &>) rather than a separator"""
+    return command[i] == '&' and ((i > 0 and command[i - 1] in '<>') or command[i + 1:i + 2] == '>')
+
+
+def _split_commands(command: str) -> List[str]:
+    """Split a command line at unquoted, unescaped separators.
+
+    Returns alternating [segment, separator, segment, ...]. Raises ValueError on
+    unbalanced quotes, like shlex.
+    """
+    parts = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(command):
+        char = command[i]
+        if quote:
+            current.append(char)
+            if char == '\\' and quote == '"' and i + 1 < len(command):
+                current.append(command[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char == '\\':
+            current.append(command[i:i + 2])
+            i += 1
+        elif char in '\'"':
+            quote = char
+            current.append(char)
+        elif char in ';|&' and not _is_redirection(command, i):
+            separator = next(op for op in COMMAND_SEPARATORS if command.startswith(op, i))
+            parts.extend([''.join(current), separator])
+            current = []
+            i += len(separator)
+            continue
+        else:
+            current.append(char)
+        i += 1
+
+    if quote:
+        raise ValueError('No closing quotation')
+    parts.append(''.join(current))
+    return parts
+
+
+def _normalize_simple_command(tokens: List[str]) -> List[str]:
+    """Unbundle and sort boolean short flags of a single known command"""
+    # The command name follows any sudo / VAR=value prefixes
+    position = 0
+    while position < len(tokens) and (tokens[position] == 'sudo' or re.fullmatch(r'\w+=.*', tokens[position])):
+        position += 1
+    if position == len(tokens) or tokens[position] not in BOOLEAN_SHORT_FLAGS:
+        return tokens
+
+    boolean_flags = BOOLEAN_SHORT_FLAGS[tokens[position]]
+    argument_flags = ARGUMENT_SHORT_FLAGS.get(tokens[position], set())
+    flags = set()
+    rest = []
+    args = iter(tokens[position + 1:])
+    for token in args:
+        if token == '--':
+            # Everything after -- is an operand
+            rest.append(token)
+            rest.extend(args)
+            break
+        if not re.fullmatch(r'-[A-Za-z0-9]+', token):
+            rest.append(token)
+        elif set(token[1:]) <= boolean_flags:
+            flags.update(token[1:])
+        elif token[-1] in argument_flags and set(token[1:-1]) <= boolean_flags:
+            # A bundle ending in an argument flag (-e, -ve) takes the next token as its argument
+            flags.update(token[1:-1])
+            rest.append('-' + token[-1])
+            argument = next(args, None)
+            if argument is not None:
+                rest.append(argument)
+        else:
+            # Unknown flags, or an argument attached to its flag (-A3, -ev)
+            rest.append(token)
+    return tokens[:position + 1] + ['-' + flag for flag in sorted(flags)] + rest
+
+
+def normalize_command(command: str) -> str:
+    """Normalize a command so that equivalent spellings compare equal.
+
+    Quoting and whitespace are normalized for every command; boolean short flags of
+    the commands in BOOLEAN_SHORT_FLAGS are also unbundled and sorted (ls -la == ls -l -a).
+    Quoted or escaped operators (echo '|', -exec ... \\;) stay arguments.
+    """
+    try:
+        parts = _split_commands(command.strip())
+        segments = [shlex.split(part) for part in parts[::2]]
+    except ValueError:
+        # Unbalanced quotes - fall back to whitespace normalization
+        return ' '.join(command.split())
+
+    separators = parts[1::2]
+    # A trailing separator (ls;) does not change the command
+    while separators and not segments[-1] and separators[-1] != '&':
+        segments.pop()
+        separators.pop()
+
+    normalized = []
+    for i, tokens in enumerate(segments):
+        # Re-quote arguments so they can never be mistaken for separators
+        normalized.extend(shlex.quote(token) for token in _normalize_simple_command(tokens))
+        if i < len(separators):
+            normalized.append(separators[i])
+    return ' '.join(normalized)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-pct * len(ordered) // 100)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the current process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _read_run_file(run_file: Path) -> Dict[int, Dict[str, Any]]:
+    """Read completed per-example records, ignoring a truncated last line"""
+    records = {}
+    if run_file.exists():
+        with open(run_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record['index']] = record
+    return records
+
+
+def _truncate_partial_line(run_file: Path):
+    """Drop a half-written last record so appended records start on a fresh line"""
+    if not run_file.exists():
+        return
+    with open(run_file, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def _evaluate_model(job: Tuple[str, str, List[Dict[str, str]], str, Dict[str, Any], Dict[str, Any]],
+                    conn: multiprocessing.connection.Connection):
+    """Evaluate a single model in a worker process, sending back an error message or None.
+
+    Runs in its own process so that peak RSS is attributable to one model.
+    """
+    try:
+        _run_model(*job)
+    except Exception as e:
+        conn.send(f"{type(e).__name__}: {e}")
+        sys.exit(1)
+    conn.send(None)
+
+
+def _exit_error(exitcode: int) -> str:
+    """Describe a worker that died without reporting an error (OOM kill, segfault)"""
+    if exitcode < 0:
+        return f"worker exited with signal {-exitcode}"
+    return f"worker exited with code {exitcode}"
+
+
+def _run_jobs(job_list: List[Tuple], jobs: int) -> Iterator[Tuple[str, Optional[str]]]:
+    """Run one spawned process per model, at most `jobs` at a time.
+
+    Yields (name, error or None) as models finish. A process that dies without
+    reporting (e.g. killed by the OOM killer) is yielded as failed rather than
+    blocking the run, which multiprocessing.Pool would do.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    pending = list(job_list)
+    running = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            job = pending.pop(0)
+            receiver, sender = ctx.Pipe(duplex=False)
+            process = ctx.Process(target=_evaluate_model, args=(job, sender))
+            process.start()
+            sender.close()
+            running[job[0]] = (process, receiver)
+
+        multiprocessing.connection.wait([process.sentinel for process, _ in running.values()])
+        for name, (process, receiver) in list(running.items()):
+            if process.exitcode is None:
+                continue
+            process.join()
+            error = None
+            try:
+                if receiver.poll():
+                    error = receiver.recv()
+            except EOFError:
+                pass
+            receiver.close()
+            del running[name]
+
+            if error is None and process.exitcode != 0:
+                error = _exit_error(process.exitcode)
+            yield name, error
+
+
+def _run_model(name: str, model_path: str, examples: List[Dict[str, str]], run_file: str,
+               load_params: Dict[str, Any], gen_params: Dict[str, Any]):
+    """Append one JSON line per pending example to the model's run file"""
+    run_file = Path(run_file)
+    _truncate_partial_line(run_file)
+    done = _read_run_file(run_file)
+    pending = [i for i in range(len(examples)) if i not in done]
+    if not pending:
+        return
+
+    model = ModelInterface(model_path, **load_params)
+
+    with open(run_file, 'a') as f:
+        for index in pending:
+            example = examples[index]
+            start = time.perf_counter()
+            predicted = model.generate_command(example['prompt'], **gen_params)
+            latency = time.perf_counter() - start
+
+            record = {
+                'index': index,
+                'prompt': example['prompt'],
+                'expected': example['command'],
+                'predicted': predicted,
+                'latency_ms': latency * 1000,
+                'peak_rss_mb': peak_rss_mb(),
+            }
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+
+
+def summarize(name: str, model_path: str, records: List[Dict[str, Any]],
+              expected_examples: int, error: Optional[str] = None) -> Dict[str, Any]:
+    """Compute accuracy, latency and memory metrics for one model.
+
+    A model is 'incomplete' when it has fewer records than the dataset has examples,
+    and 'failed' when its worker raised; metrics then cover only the records present.
+    """
+    total = len(records)
+    if error is not None:
+        status = 'failed'
+    elif total != expected_examples:
+        status = 'incomplete'
+    else:
+        status = 'ok'
+
+    exact = sum(1 for r in records if r['predicted'].strip() == r['expected'].strip())
+    normalized = sum(1 for r in records
+                     if normalize_command(r['predicted']) == normalize_command(r['expected']))
+    latencies = [r['latency_ms'] for r in records]
+    rss = [r['peak_rss_mb'] for r in records if r.get('peak_rss_mb') is not None]
+
+    return {
+        'name': name,
+        'model_path': model_path,
+        'status': status,
+        'error': error,
+        'examples': total,
+        'exact_match': exact / total if total else 0.0,
+        'normalized_match': normalized / total if total else 0.0,
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p95_ms': percentile(latencies, 95),
+        'peak_rss_mb': max(rss) if rss else None,
+    }
+
+
+def pareto_front(results: List[Dict[str, Any]]) -> List[str]:
+    """Names of complete models not dominated on (normalized accuracy, p95 latency, peak RSS)"""
+    results = [result for result in results if result.get('status', 'ok') == 'ok']
+
+    def objectives(result):
+        # Lower is better for every objective; unknown values count as worst
+        worst = float('inf')
+        latency, rss = result['latency_p95_ms'], result['peak_rss_mb']
+        return (-result['normalized_match'],
+                latency if latency is not None else worst,
+                rss if rss is not None else worst)
+
+    front = []
+    for candidate in results:
+        a = objectives(candidate)
+        dominated = False
+        for other in results:
+            b = objectives(other)
+            if all(y <= x for x, y in zip(a, b)) and any(y < x for x, y in zip(a, b)):
+                dominated = True
+                break
+        if not dominated:
+            front.append(candidate['name'])
+    return front
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    """Render the evaluation report as a Markdown table"""
+    def fmt(value, spec):
+        return 'n/a' if value is None else format(value, spec)
+
+    lines = [
+        '# Shazam model evaluation',
+        '',
+        f"Dataset: `{report['dataset']}` ({report['examples']} examples)",
+        '',
+        '| Model | Status | Examples | Exact match | Normalized match | p50 latency (ms) | p95 latency (ms) | Peak RSS (MB) | Pareto |',
+        '|-------|--------|----------|-------------|------------------|------------------|------------------|---------------|--------|',
+    ]
+    ordered = sorted(report['models'], key=lambda r: r['normalized_match'], reverse=True)
+    for result in ordered:
+        lines.append(
+            f"| {result['name']} "
+            f"| {result['status']} "
+            f"| {result['examples']}/{report['examples']} "
+            f"| {result['exact_match']:.1%} "
+            f"| {result['normalized_match']:.1%} "
+            f"| {fmt(result['latency_p50_ms'], '.0f')} "
+            f"| {fmt(result['latency_p95_ms'], '.0f')} "
+            f"| {fmt(result['peak_rss_mb'], '.0f')} "
+            f"| {'✅' if result['name'] in report['pareto_front'] else ''} |"
+        )
+    lines.append('')
+    if report.get('parallel_jobs', 1) > 1:
+        lines.append(f"⚠️ Latency was measured with up to {report['parallel_jobs']} models running at once, "
+                     "so it depends on which models shared the machine. Re-run with `-j 1` for comparable latencies.")
+        lines.append('')
+    lines.append('Pareto front: complete models not beaten on normalized accuracy, p95 latency and peak RSS at once.')
+    for result in ordered:
+        if result['error']:
+            lines.append('')
+            lines.append(f"`{result['name']}` failed: {result['error']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _parse_models(specs: List[str]) -> List[Tuple[str, str]]:
+    """Parse NAME=PATH or PATH model specs into unique (name, path) pairs"""
+    models = []
+    for spec in specs:
+        if '=' in spec:
+            name, path = spec.split('=', 1)
+        else:
+            path = spec
+            name = Path(spec).stem
+        models.append((name.strip(), os.path.abspath(os.path.expanduser(path.strip()))))
+
+    names = [name for name, _ in models]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise click.BadParameter(f"duplicate model names: {', '.join(duplicates)} (use NAME=PATH)")
+    return models
+
+
+def _run_key(model_path: str, dataset_hash: str, load_params: Dict[str, Any],
+             gen_params: Dict[str, Any], jobs: int) -> str:
+    """Fingerprint of everything that affects a model's results, used to name its run file.
+
+    Resuming only happens when the dataset, model file, parameters and parallelism
+    (which affects latency) are all unchanged.
+    """
+    stat = os.stat(model_path)
+    key = {
+        'dataset': dataset_hash,
+        'model_path': model_path,
+        'model_size': stat.st_size,
+        'model_mtime_ns': stat.st_mtime_ns,
+        'load_params': load_params,
+        'gen_params': gen_params,
+        'jobs': jobs,
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:12]
+
+
+@click.command()
+@click.argument('dataset', type=click.Path(exists=True, dir_okay=False))
+@click.option('-m', '--model', 'model_specs', multiple=True,
+              help='GGUF model to evaluate as PATH or NAME=PATH (repeatable)')
+@click.option('-o', '--output', default='shazam-eval', show_default=True,
+              help='Directory for per-model run files and reports')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=1, show_default=True,
+              help='Models evaluated in parallel; above 1, latency is measured under shared load')
+@click.option('-t', '--threads-per-model', type=click.IntRange(min=1), default=None,
+              help='llama.cpp threads given to each model [default: cores / jobs]')
+def main(dataset, model_specs, output, jobs, threads_per_model):
+    """
+    📊 Evaluate GGUF models on a held-out set of NL->bash pairs
+
+    DATASET is a JSONL file with one {"prompt": ..., "command": ...} object per line.
+    Models default to `evaluation.models` in the config, then to `model_path`.
+    Interrupted runs resume where they stopped when re-run with the same output directory.
+    Models run one at a time by default so their latencies are comparable; -j N
+    runs N at once, faster but with latency measured under shared CPU and memory load.
+
+    Examples:
+        shazam-eval heldout.jsonl -m q3=models/phi3.Q3_K_M.gguf -m q4=models/phi3.Q4_K_M.gguf
+    """
+    config = Config()
+
+    if not model_specs:
+        model_specs = config.get('evaluation.models') or [config.get('model_path')]
+    models = _parse_models([spec for spec in model_specs if spec])
+    missing = [path for _, path in models if not os.path.exists(path)]
+    if missing:
+        print(f"{Fore.RED}❌ Model file not found: {', '.join(missing)}{Style.RESET_ALL}")
+        sys.exit(1)
+
+    examples = load_dataset(dataset)
+    if not examples:
+        print(f"{Fore.RED}❌ No examples found in {dataset}{Style.RESET_ALL}")
+        sys.exit(1)
+
+    with open(dataset, 'rb') as f:
+        dataset_hash = hashlib.sha1(f.read()).hexdigest()
+    runs_dir = Path(output) / 'runs'
+    runs_dir.mkdir(parents=True, exist_ok=True)
+
+    snapshot = config.snapshot
+    gen_params = {
+        'max_tokens': snapshot.max_tokens,
+        'temperature': snapshot.temperature,
+        'top_p': snapshot.top_p,
+        'stop_sequences': snapshot.stop_sequences,
+    }
+    jobs = min(jobs, len(models))
+    if threads_per_model is None:
+        threads_per_model = max(1, (os.cpu_count() or 1) // jobs)
+    load_params = {**snapshot.model_params, 'n_threads': threads_per_model}
+
+    job_list = [
+        (name, path, examples, str(runs_dir / f'{name}-{_run_key(path, dataset_hash, load_params, gen_params, jobs)}.jsonl'),
+         load_params, gen_params)
+        for name, path in models
+    ]
+
+    print(f"{Fore.YELLOW}Evaluating {len(models)} model(s) on {len(examples)} examples "
+          f"with {jobs} parallel job(s)...{Style.RESET_ALL}")
+
+    errors = {}
+    for name, error in _run_jobs(job_list, jobs):
+        if error:
+            errors[name] = error
+            print(f"{Fore.RED}❌ {name} failed: {error}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.GREEN}✅ Finished {name}{Style.RESET_ALL}")
+
+    results = []
+    for name, path, _, run_file, _, _ in job_list:
+        records = list(_read_run_file(Path(run_file)).values())
+        results.append(summarize(name, path, records, len(examples), errors.get(name)))
+
+    report = {
+        'dataset': os.path.abspath(dataset),
+        'examples': len(examples),
+        'parallel_jobs': jobs,
+        'pareto_objectives': ['normalized_match', 'latency_p95_ms', 'peak_rss_mb'],
+        'pareto_front': pareto_front(results),
+        'models': results,
+    }
+
+    json_path = Path(output) / 'report.json'
+    md_path = Path(output) / 'report.md'
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    with open(md_path, 'w') as f:
+        f.write(render_markdown(report))
+
+    print(render_markdown(report))
+    print(f"{Fore.CYAN}Reports written to {json_path} and {md_path}{Style.RESET_ALL}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,9 +5,12 @@ GGUF model interface for Shazam CLI tool
 
 import re
 import os
-from typing import Optional, List
+from typing import Optional, List, Sequence, Tuple
+import numpy as np
 from llama_cpp import Llama
 
+DEFAULT_STOP_SEQUENCES = ['\n\n', 'User:', 'Assistant:']
+
 class ModelInterface:
     def __init__(self, model_path: str, **kwargs):
         """Initialize the GGUF model"""
@@ -48,6 +51,33 @@ class ModelInterface:
         if not self.model:
             raise RuntimeError("Model not loaded")
         
+        full_prompt = self._build_prompt(prompt)
+        
+        try:
+            # Generate response
+            response = self.model(
+                full_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
+                stop=stop_sequences or DEFAULT_STOP_SEQUENCES,
+                echo=False
+            )
+            
+            # Extract the generated text
+            generated_text = response['choices'][0]['text'].strip()
+            
+            # Clean up the response
+            command = self._clean_command(generated_text)
+            
+            return command
+            
+        except Exception as e:
+            print(f"Error generating command: {e}")
+            return ""
+    
+    def _build_prompt(self, prompt: str) -> str:
+        """Build the full completion prompt for a natural language request"""
         # Create a focused system prompt for bash command generation
         system_prompt = """You are a helpful AI assistant that converts natural language requests into bash commands. 
 
@@ -72,30 +102,100 @@ Assistant: find . -name "*.py"
 User: """
 
         # Combine system prompt with user prompt
-        full_prompt = system_prompt + prompt + "\nAssistant: "
+        return system_prompt + prompt + "\nAssistant: "
+    
+    def generate_candidates(self, prompt: str, n: int = 3, max_tokens: int = 150,
+                            stop_sequences: Optional[List[str]] = None,
+                            dangerous_patterns: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """Generate up to n distinct bash commands from a single prompt evaluation.
+        
+        The prompt is evaluated once; each candidate then branches from one of the most
+        likely first tokens and is decoded greedily on top of the shared KV cache.
+        Returns (command, logprob) pairs ranked by sequence log-probability, with
+        commands flagged by is_dangerous_command moved after the safe ones.
+        """
+        if not self.model:
+            raise RuntimeError("Model not loaded")
+        
+        stop_sequences = stop_sequences or DEFAULT_STOP_SEQUENCES
         
         try:
-            # Generate response
-            response = self.model(
-                full_prompt,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                top_p=top_p,
-                stop=stop_sequences or ['\n\n', 'User:', 'Assistant:'],
-                echo=False
-            )
-            
-            # Extract the generated text
-            generated_text = response['choices'][0]['text'].strip()
+            prompt_tokens = self.model.tokenize(self._build_prompt(prompt).encode('utf-8'))
+            self.model.reset()
+            self.model._ctx.kv_cache_seq_rm(-1, 0, -1)
+            self.model.eval(prompt_tokens)
+            prefix_len = self.model.n_tokens
+            prefix_logprobs = self._last_logprobs()
             
-            # Clean up the response
-            command = self._clean_command(generated_text)
+            # Branch on more first tokens than needed since branches often collapse to the same command
+            first_tokens = np.argsort(prefix_logprobs)[::-1][:n * 2]
             
-            return command
+            candidates = {}
+            for token in first_tokens:
+                # Rewind to the end of the prompt, dropping the previous branch's KV cells
+                self.model._ctx.kv_cache_seq_rm(-1, prefix_len, -1)
+                self.model.n_tokens = prefix_len
+                text, logprob = self._decode_branch(int(token), float(prefix_logprobs[token]),
+                                                    max_tokens, stop_sequences)
+                command = self._clean_command(text.strip())
+                if command and logprob > candidates.get(command, float('-inf')):
+                    candidates[command] = logprob
             
         except Exception as e:
             print(f"Error generating command: {e}")
-            return ""
+            return []
+        
+        dangerous_patterns = dangerous_patterns or []
+        ranked = sorted(
+            candidates.items(),
+            key=lambda item: (self.is_dangerous_command(item[0], dangerous_patterns), -item[1])
+        )
+        return ranked[:n]
+    
+    def _decode_branch(self, token: int, token_logprob: float, max_tokens: int,
+                       stop_sequences: List[str]) -> Tuple[str, float]:
+        """Greedily decode from a first token, returning the text and its total logprob"""
+        eos = self.model.token_eos()
+        budget = min(max_tokens, self.model.n_ctx() - self.model.n_tokens)
+        tokens = []
+        text = ''
+        logprob = 0.0
+        
+        for _ in range(budget):
+            if token == eos:
+                break
+            tokens.append(token)
+            logprob += token_logprob
+            text = self.model.detokenize(tokens).decode('utf-8', errors='ignore')
+            
+            stop_positions = [text.find(stop) for stop in stop_sequences if stop in text]
+            # Only the first line is kept as the command, so stop at the newline ending it
+            content_start = len(text) - len(text.lstrip())
+            if text.find('\n', content_start) > content_start:
+                stop_positions.append(text.find('\n', content_start))
+            if stop_positions:
+                text = text[:min(stop_positions)]
+                break
+            
+            self.model.eval([token])
+            logprobs = self._last_logprobs()
+            token = int(np.argmax(logprobs))
+            token_logprob = float(logprobs[token])
+        
+        return text, logprob
+    
+    def _last_logprobs(self) -> np.ndarray:
+        """Log-probabilities of the next token after the last evaluated one"""
+        # Read llama.cpp's logits buffer directly: Llama.scores is only filled with logits_all=True
+        logits = np.ctypeslib.as_array(self.model._ctx.get_logits(), shape=(self.model.n_vocab(),))
+        return self._log_softmax(logits)
+    
+    @staticmethod
+    def _log_softmax(logits) -> np.ndarray:
+        """Convert raw logits to log-probabilities"""
+        shifted = np.asarray(logits, dtype=np.float64)
+        shifted = shifted - shifted.max()
+        return shifted - np.log(np.exp(shifted).sum())
     
     def _clean_command(self, raw_command: str) -> str:
         """Clean and validate the generated command"""
@@ -123,7 +223,7 @@ User: """
         
         return command
     
-    def is_dangerous_command(self, command: str, dangerous_patterns: List[str]) -> bool:
+    def is_dangerous_command(self, command: str, dangerous_patterns: Sequence[str]) -> bool:
         """Check if a command contains dangerous patterns"""
         command_lower = command.lower()
         
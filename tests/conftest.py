@@ -0,0 +1,14 @@
+"""
+Shared test setup for Shazam
+"""
+
+import sys
+import types
+
+try:
+    import llama_cpp  # noqa: F401
+except ImportError:
+    # Tests never load a real model; a placeholder module lets the package import
+    llama_cpp = types.ModuleType('llama_cpp')
+    llama_cpp.Llama = None
+    sys.modules['llama_cpp'] = llama_cpp
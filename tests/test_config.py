@@ -0,0 +1,62 @@
+"""
+Tests for the config file, its compiled snapshot and concurrent-safe writes
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from shazam.config import Config
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    return tmp_path
+
+
+def test_snapshot_loads_without_yaml(home, monkeypatch):
+    Config().set('model_params.temperature', 0.3)
+
+    monkeypatch.delitem(sys.modules, 'yaml', raising=False)
+    config = Config()
+    assert 'yaml' not in sys.modules
+    assert config.snapshot.temperature == 0.3
+    assert config.get('model_params.temperature') == 0.3
+    assert config.get('missing.key', 5) == 5
+
+
+def test_snapshot_invalidated_by_yaml_edit(home):
+    Config().set('command_name', 'friday')
+    config_file = home / '.shazam' / 'config.yaml'
+    config_file.write_text(config_file.read_text().replace('friday', 'cortana'))
+
+    assert Config().get('command_name') == 'cortana'
+
+
+def test_snapshot_model_params_exclude_generation_keys(home):
+    config = Config()
+    config.set('model_params.n_ctx', 1024)
+
+    assert config.snapshot.model_params == {'n_ctx': 1024}
+    assert config.snapshot.max_tokens == 150
+    assert Config().snapshot.model_params == {'n_ctx': 1024}
+
+
+def test_set_keeps_symlink_and_mode(home, tmp_path):
+    Config().set('command_name', 'jarvis')
+    config_file = home / '.shazam' / 'config.yaml'
+    target = tmp_path / 'dotfiles' / 'config.yaml'
+    target.parent.mkdir()
+    os.replace(config_file, target)
+    os.chmod(target, 0o644)
+    config_file.symlink_to(target)
+
+    Config().set('command_name', 'bob')
+
+    assert config_file.is_symlink()
+    assert 'bob' in target.read_text()
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o644
+    assert Config().get('command_name') == 'bob'
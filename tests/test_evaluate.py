@@ -0,0 +1,135 @@
+"""
+Tests for the model evaluator's scoring, resume and reporting helpers
+"""
+
+import json
+
+import pytest
+
+from shazam.evaluate import (
+    normalize_command, percentile, pareto_front, summarize, render_markdown,
+    _exit_error, _read_run_file, _truncate_partial_line,
+)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('ls -la', 'ls -al'),
+    ('ls -la', 'ls -l -a'),
+    ('ls -l -a /tmp', 'ls -al /tmp'),
+    ('sudo ls -la', 'sudo ls -a -l'),
+    ("find . -name '*.py'", 'find . -name "*.py"'),
+    ('df  -h', 'df -h'),
+    ('ls -la;', 'ls -la'),
+    ('ps aux | grep -in python', 'ps aux | grep -ni python'),
+    ('grep -v -e foo f', 'grep -ve foo f'),
+    ('ls -la 2>&1 | wc -l', 'ls -al 2>&1 | wc -l'),
+    ("echo 'a;b'", 'echo a\\;b'),
+])
+def test_normalize_command_equivalent(a, b):
+    assert normalize_command(a) == normalize_command(b)
+
+
+@pytest.mark.parametrize('a, b', [
+    ('tar -cfz x', 'tar -czf x'),
+    ('ls -la', 'ls -l'),
+    ('sudo find . -name x', 'sudo find . -mane x'),
+    ('grep -e foo -i bar', 'grep -i foo -e bar'),
+    ('ls -la | wc -l', 'ls -la | wc -w'),
+    ('find . -name x -exec rm {} \\;', 'find . -name x -exec rm {}'),
+    ("echo '|' wc", 'echo | wc'),
+    ('grep -e -v f', 'grep -v -e f'),
+    ('sort -k -r x', 'sort -r -k x'),
+])
+def test_normalize_command_different(a, b):
+    assert normalize_command(a) != normalize_command(b)
+
+
+def test_normalize_command_leaves_find_options_alone():
+    assert normalize_command('sudo find . -name x') == 'sudo find . -name x'
+
+
+def test_normalize_command_keeps_flag_arguments():
+    assert normalize_command('grep -e -v f') == 'grep -e -v f'
+    assert normalize_command('grep -ie -v -n f') == 'grep -i -n -e -v f'
+    assert normalize_command('grep -A3 -v f') == 'grep -v -A3 f'
+
+
+def test_normalize_command_quoted_separators_stay_arguments():
+    assert normalize_command('find . -exec rm {} \\;') == "find . -exec rm '{}' ';'"
+    assert normalize_command("echo '|' wc") == "echo '|' wc"
+    assert normalize_command('echo | wc') == 'echo | wc'
+
+
+def test_normalize_command_unbalanced_quotes():
+    assert normalize_command("echo 'oops  there") == "echo 'oops there"
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([5], 95) == 5
+    assert percentile([4, 1, 3, 2], 50) == 2
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile(list(range(1, 101)), 100) == 100
+
+
+def _result(name, accuracy, latency, rss, status='ok'):
+    return {'name': name, 'status': status, 'normalized_match': accuracy,
+            'latency_p95_ms': latency, 'peak_rss_mb': rss}
+
+
+def test_pareto_front_drops_dominated_models():
+    results = [
+        _result('accurate', 0.8, 100, 3000),
+        _result('fast', 0.7, 80, 2500),
+        _result('dominated', 0.6, 90, 2600),
+    ]
+    assert pareto_front(results) == ['accurate', 'fast']
+
+
+def test_pareto_front_ties_are_not_dominated():
+    results = [_result('a', 0.5, 100, 100), _result('b', 0.5, 100, 100)]
+    assert pareto_front(results) == ['a', 'b']
+
+
+def test_pareto_front_ignores_failed_and_incomplete_models():
+    results = [
+        _result('ok', 0.5, 100, 100),
+        _result('partial', 0.9, 10, 10, status='incomplete'),
+        _result('broken', 0.0, None, None, status='failed'),
+    ]
+    assert pareto_front(results) == ['ok']
+
+
+def test_summarize_flags_incomplete_and_failed():
+    records = [{'predicted': 'ls -al', 'expected': 'ls -la', 'latency_ms': 10.0, 'peak_rss_mb': 50.0}]
+    complete = summarize('m', '/m.gguf', records, 1)
+    assert complete['status'] == 'ok'
+    assert complete['exact_match'] == 0.0
+    assert complete['normalized_match'] == 1.0
+    assert summarize('m', '/m.gguf', records, 2)['status'] == 'incomplete'
+    assert summarize('m', '/m.gguf', [], 2, error='boom')['status'] == 'failed'
+
+
+def test_resume_after_truncated_record(tmp_path):
+    run_file = tmp_path / 'run.jsonl'
+    run_file.write_text(json.dumps({'index': 0}) + '\n{"index": 1, "pre')
+
+    _truncate_partial_line(run_file)
+    with open(run_file, 'a') as f:
+        f.write(json.dumps({'index': 1}) + '\n')
+
+    assert sorted(_read_run_file(run_file)) == [0, 1]
+
+
+def test_exit_error_describes_killed_workers():
+    assert _exit_error(-9) == 'worker exited with signal 9'
+    assert _exit_error(1) == 'worker exited with code 1'
+
+
+def test_render_markdown_flags_parallel_latency():
+    records = [{'predicted': 'ls', 'expected': 'ls', 'latency_ms': 10.0, 'peak_rss_mb': 50.0}]
+    report = {'dataset': 'heldout.jsonl', 'examples': 1, 'pareto_front': ['m'],
+              'models': [summarize('m', '/m.gguf', records, 1)]}
+
+    assert 'running at once' not in render_markdown({**report, 'parallel_jobs': 1})
+    assert 'up to 3 models running at once' in render_markdown({**report, 'parallel_jobs': 3})
@@ -0,0 +1,113 @@
+"""
+Tests for N-best candidate generation with a stubbed llama.cpp model
+"""
+
+import ctypes
+
+import numpy as np
+import pytest
+
+import shazam.model as model_module
+from shazam.model import ModelInterface
+
+VOCAB = ['<eos>', 'ls', ' -la', '\n', 'rm', ' -rf', ' /', 'du', ' -sh', 'pwd', ' ', 'ls ', '-la']
+EOS = 0
+PROMPT = 100
+
+# Greedy continuation after each token; the 'ls ' + '-la' branch duplicates the 'ls' one
+NEXT_TOKEN = {1: 2, 2: 3, 4: 5, 5: 6, 6: 3, 7: 8, 8: 3, 9: 3, 10: 9, 11: 12, 12: 3}
+FIRST_TOKEN_LOGITS = {1: 5.0, 4: 4.0, 11: 3.5, 7: 3.0, 10: 2.5}
+
+
+class StubContext:
+    """The parts of llama_cpp's internal context used by ModelInterface"""
+
+    def __init__(self):
+        self.kv_cells = []
+        self.logits = np.zeros(len(VOCAB), dtype=np.float32)
+
+    def kv_cache_seq_rm(self, seq_id, p0, p1):
+        del self.kv_cells[p0:]
+
+    def get_logits(self):
+        return self.logits.ctypes.data_as(ctypes.POINTER(ctypes.c_float))
+
+
+class StubLlama:
+    """Mimics llama-cpp-python 0.3.x: eval() never fills Llama.scores without logits_all"""
+
+    def __init__(self, model_path, **kwargs):
+        self._ctx = StubContext()
+        self.n_tokens = 0
+        self.prompt_evals = 0
+        self.scores = np.full((1, len(VOCAB)), np.nan, dtype=np.float32)
+
+    def tokenize(self, text):
+        return [PROMPT] * 4
+
+    def detokenize(self, tokens):
+        return ''.join(VOCAB[token] for token in tokens).encode('utf-8')
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def n_ctx(self):
+        return 2048
+
+    def n_vocab(self):
+        return len(VOCAB)
+
+    def token_eos(self):
+        return EOS
+
+    def eval(self, tokens):
+        # Stale cells past n_tokens would mean a branch sees another branch's tokens
+        assert len(self._ctx.kv_cells) == self.n_tokens
+        self._ctx.kv_cells.extend(tokens)
+        self.n_tokens += len(tokens)
+
+        logits = np.full(len(VOCAB), -10.0, dtype=np.float32)
+        last = tokens[-1]
+        if last == PROMPT:
+            self.prompt_evals += 1
+            for token, logit in FIRST_TOKEN_LOGITS.items():
+                logits[token] = logit
+        else:
+            logits[NEXT_TOKEN.get(last, EOS)] = 10.0
+        self._ctx.logits[:] = logits
+
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(model_module, 'Llama', StubLlama)
+    return ModelInterface('stub.gguf')
+
+
+def test_candidates_are_ranked_by_logprob(model):
+    candidates = model.generate_candidates('list files', n=4)
+    commands = [command for command, _ in candidates]
+    assert commands == ['ls -la', 'rm -rf /', 'du -sh', 'pwd']
+    logprobs = [logprob for _, logprob in candidates]
+    assert logprobs == sorted(logprobs, reverse=True)
+    assert model.model.prompt_evals == 1
+
+
+def test_candidates_are_distinct(model):
+    candidates = model.generate_candidates('list files', n=5)
+    commands = [command for command, _ in candidates]
+    assert len(commands) == len(set(commands))
+    # Both 'ls' + ' -la' and 'ls ' + '-la' give 'ls -la'; the likelier branch is kept
+    assert commands.count('ls -la') == 1
+    first = np.full(len(VOCAB), -10.0)
+    for token, logit in FIRST_TOKEN_LOGITS.items():
+        first[token] = logit
+    ls_logprob = first[1] - np.log(np.exp(first).sum())
+    assert candidates[0] == ('ls -la', pytest.approx(ls_logprob, abs=1e-3))
+
+
+def test_dangerous_candidates_are_demoted(model):
+    candidates = model.generate_candidates('list files', n=len(VOCAB), dangerous_patterns=['rm -rf /'])
+    commands = [command for command, _ in candidates]
+    assert commands[:3] == ['ls -la', 'du -sh', 'pwd']
+    # Demoted below every safe candidate, however unlikely
+    assert commands[-1] == 'rm -rf /'